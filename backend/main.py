@@ -1,14 +1,19 @@
 # File: main.py
 from __future__ import annotations
-import threading, os, uuid, requests, subprocess, sys, shutil, glob, time, re
-from fastapi import FastAPI, HTTPException
+import asyncio, functools, threading, os, uuid, subprocess, sys, shutil, time, re
+from concurrent.futures import ThreadPoolExecutor
+import aiofiles
+import aiohttp
+from yt_dlp import YoutubeDL
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
 from fastapi.staticfiles import StaticFiles
 from datetime import datetime
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+import orjson
 
 
 # Ensure downloads folder exists
@@ -20,6 +25,9 @@ os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONTEND_DIST = os.getenv("FRONTEND_DIST", os.path.abspath(os.path.join(BASE_DIR, "..", "frontend", "dist")))
 
+# Compiled once at import; used on every download to build a safe outtmpl
+_SANITIZE_RE = re.compile(r'[\\/*?:"<>|]')
+
 # ---- Models ----
 class TaskStatus(BaseModel):
     id: str
@@ -47,6 +55,14 @@ class StartRequest(BaseModel):
 
 # ---- Task & Manager ----
 class Task:
+    # slots: C-level offset access instead of a per-instance __dict__;
+    # to_status() reads every field once per poll
+    __slots__ = (
+        "id", "url", "category", "fmt", "quality", "status", "progress",
+        "title", "filename", "filepath", "message", "control", "speed",
+        "eta", "downloaded_at", "download_url", "worker",
+    )
+
     def __init__(self, tid: str, req: StartRequest):
         self.id = tid
         self.url = req.url
@@ -64,11 +80,20 @@ class Task:
         self.eta: Optional[int] = None
         self.downloaded_at: Optional[str] = None
         self.download_url: Optional[str] = None
-        self.lock = threading.Lock()
-        self.thread: Optional[threading.Thread] = None
+        self.worker: Optional[asyncio.Task] = None
+
+    def __setattr__(self, name, value):
+        # any mutation invalidates the cached /api/download/all snapshot
+        object.__setattr__(self, name, value)
+        manager.touch()
+        if name == "status" and value in ("completed", "canceled"):
+            manager._cleanup_candidates.add(self.id)
 
     def to_status(self) -> TaskStatus:
-        return TaskStatus(
+        # unlocked reads: fields are scalars written atomically under the GIL,
+        # so a status snapshot may be mildly torn — fine for a polling endpoint
+        # model_construct: fields come straight from the task, skip validation
+        return TaskStatus.model_construct(
             id=self.id,
             url=self.url,
             title=self.title,
@@ -89,51 +114,74 @@ class Task:
 class Manager:
     def __init__(self):
         self.tasks: dict[str, Task] = {}
+        self.lock = threading.Lock()
+        # cached /api/download/all payload; rebuilt lazily when a task mutates
+        self._snapshot: list[dict] = []
+        self._snapshot_dirty = True
+        # bumped on every mutation; SSE subscribers push when it moves
+        self._version = 0
+        # task ids that reached completed/canceled and await file cleanup
+        self._cleanup_candidates: set[str] = set()
+
+    def touch(self):
+        # invalidate the cached snapshot and signal SSE subscribers
+        self._snapshot_dirty = True
+        self._version += 1
 
     def get(self, tid: str) -> Task:
         if tid not in self.tasks:
             raise KeyError
         return self.tasks[tid]
 
-    def all(self) -> List[TaskStatus]:
-        return [t.to_status() for t in self.tasks.values()]
-    
+    def all(self) -> list[dict]:
+        if self._snapshot_dirty:
+            with self.lock:
+                # clear the flag *before* rebuilding: a worker-thread write
+                # landing mid-rebuild re-dirties it, so the next poll rebuilds
+                # instead of serving the stale snapshot forever
+                self._snapshot_dirty = False
+                self._snapshot = [t.to_status().model_dump() for t in self.tasks.values()]
+        return self._snapshot
+
         # ✅ New method: clear complete task (memory free)
     def clear_completed(self):
         to_delete = [tid for tid, t in self.tasks.items() if t.status == "completed"]
         for tid in to_delete:
             del self.tasks[tid]
+        self.touch()
 
     def clear_canceled(self):
         to_delete = [tid for tid, t in self.tasks.items() if t.status == "canceled"]
         for tid in to_delete:
             del self.tasks[tid]
+        self.touch()
 
 
 manager = Manager()
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 
 
-# ✅ CORS (dev friendly)
+# ✅ CORS (dev friendly by default; set ALLOWED_ORIGINS=https://a.com,https://b.com in prod)
+ALLOWED_ORIGINS = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "*").split(",") if o.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # browsers cache the preflight reply for a day
 )
 
-# ✅ Do NOT cache API responses
-@app.middleware("http")
-async def no_cache_for_api(request, call_next):
-    response: Response = await call_next(request)
-    if request.url.path.startswith("/api/"):
-        # ensure API is always fresh
-        response.headers["Cache-Control"] = "no-store"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-    return response
+# ✅ Do NOT cache API responses — router dependency instead of an ASGI
+# middleware so static/asset requests skip the per-request check entirely
+_NO_CACHE_HEADERS = {"Cache-Control": "no-store", "Pragma": "no-cache", "Expires": "0"}
+
+def _no_cache(response: Response):
+    # ensure API is always fresh
+    response.headers.update(_NO_CACHE_HEADERS)
+
+api_router = APIRouter(prefix="/api", dependencies=[Depends(_no_cache)])
 
 # ---- Helpers ----
 def get_video_title(url: str) -> Optional[str]:
@@ -141,17 +189,22 @@ def get_video_title(url: str) -> Optional[str]:
     if not cmd:
         return None
     try:
-        result = subprocess.run(cmd + ["--get-title", url], capture_output=True, text=True, timeout=20)
+        # read bytes and decode once: titles are UTF-8, no locale codec probe
+        result = subprocess.run(cmd + ["--get-title", url], capture_output=True, timeout=20, check=False)
         if result.returncode == 0:
-            title = result.stdout.strip()
+            title = result.stdout.decode("utf-8", "ignore").strip()
             return title if title else None
     except Exception:
         pass
     return None
 
+# memoized: shutil.which walks $PATH and the version probes fork a
+# subprocess; neither answer changes while the server is running
+@functools.lru_cache(maxsize=None)
 def _bin_exists(name: str) -> bool:
     return shutil.which(name) is not None
 
+@functools.lru_cache(maxsize=None)
 def _ytdlp_cmd() -> list[str] | None:
     ytdlp_bin = shutil.which("yt-dlp") or shutil.which("yt_dlp")
     if ytdlp_bin:
@@ -163,253 +216,269 @@ def _ytdlp_cmd() -> list[str] | None:
     except Exception:
         return None
 
+@functools.lru_cache(maxsize=None)
 def _ytdlp_version() -> str | None:
     cmd = _ytdlp_cmd()
     if not cmd: 
         return None
     try:
-        out = subprocess.check_output(cmd + ["--version"], text=True, timeout=10)
-        return out.strip() or None
+        result = subprocess.run(cmd + ["--version"], capture_output=True, timeout=10, check=False)
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode("utf-8", "ignore").strip() or None
     except Exception:
         return None
 
+@functools.lru_cache(maxsize=None)
 def _ffmpeg_version() -> str | None:
     if not _bin_exists("ffmpeg"):
         return None
     try:
-        out = subprocess.check_output(["ffmpeg", "-version"], text=True, timeout=10)
-        return out.splitlines()[0]
+        result = subprocess.run(["ffmpeg", "-version"], capture_output=True, timeout=10, check=False)
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode("utf-8", "ignore").splitlines()[0]
     except Exception:
         return None
 
-@app.get("/api/health")
-def health():
+@api_router.get("/health")
+async def health():
+    # version probes fork subprocesses; keep them off the event loop
+    yt_dlp_ver, ffmpeg_ver = await asyncio.gather(
+        asyncio.to_thread(_ytdlp_version),
+        asyncio.to_thread(_ffmpeg_version),
+    )
     return {
-        "yt_dlp": _ytdlp_version(),
-        "ffmpeg": _ffmpeg_version(),
+        "yt_dlp": yt_dlp_ver,
+        "ffmpeg": ffmpeg_ver,
         "time": datetime.now().isoformat(),
     }
 
 
 
 # ---- Download Workers ----
-def run_ytdlp(task: Task):
-    ytdlp_bin = shutil.which("yt-dlp") or shutil.which("yt_dlp")
-    base = [ytdlp_bin] if ytdlp_bin else [sys.executable, "-m", "yt_dlp"]
+class DownloadCancelled(Exception):
+    """Raised from a progress hook to abort an in-process yt-dlp run."""
+    def __init__(self, control: str):
+        super().__init__(control)
+        self.control = control
 
-    safe_title = re.sub(r'[\\/*?:"<>|]', "_", task.title) if task.title else task.id
+
+def _run_ytdlp_blocking(task: Task):
+    safe_title = _SANITIZE_RE.sub("_", task.title) if task.title else task.id
     outtmpl = os.path.join(DOWNLOAD_DIR, f"{safe_title}.%(ext)s")
 
     fsel_video = "bv*+ba/best"
     fsel_audio = "bestaudio/best"
 
-    # Build command incrementally so frontend fmt/quality actually reflect
-    cmd: list[str] = base + ["--newline", "-o", outtmpl]
+    def hook(d):
+        # control check + structured progress per callback
+        status = d.get("status")
+        fname = d.get("filename")
+        if task.control in ("pause", "cancel"):
+            raise DownloadCancelled(task.control)
+        if status == "downloading":
+            total = d.get("total_bytes") or d.get("total_bytes_estimate")
+            downloaded = d.get("downloaded_bytes")
+            if total and downloaded is not None:
+                task.progress = max(0.0, min(1.0, downloaded / total))
+            task.speed = d.get("speed")
+            task.eta = d.get("eta")
+        if fname:
+            task.filename = os.path.basename(fname)
+            task.download_url = f"/downloads/{task.filename}"
+
+    def pp_hook(d):
+        # progress hooks stop firing once yt-dlp hands off to ffmpeg for
+        # merge/extract; check control here too so a cancel doesn't leave
+        # post-processing running to completion
+        if task.control in ("pause", "cancel"):
+            raise DownloadCancelled(task.control)
+
+    # Build options incrementally so frontend fmt/quality actually reflect
+    ydl_opts: dict = {
+        "outtmpl": outtmpl,
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "progress_hooks": [hook],
+        "postprocessor_hooks": [pp_hook],
+    }
 
     # quality (video only) using sort key
     if task.category in ("video",) and isinstance(task.quality, str) and task.quality.endswith("p"):
         try:
             res = int(task.quality[:-1])
-            cmd += ["-S", f"res:{res}"]
+            ydl_opts["format_sort"] = [f"res:{res}"]
         except Exception:
             pass
 
     # format selection (and extraction for audio)
     if task.category == "audio":
-        cmd += ["-f", fsel_audio, "-x"]
+        ydl_opts["format"] = fsel_audio
+        pp = {"key": "FFmpegExtractAudio"}
         afmt = (task.fmt or "").lower()
         if afmt in {"mp3", "m4a", "aac"}:
-            cmd += ["--audio-format", afmt]
+            pp["preferredcodec"] = afmt
         # why: reflect user's chosen audio format from UI
+        ydl_opts["postprocessors"] = [pp]
     else:  # video
-        cmd += ["-f", fsel_video]
+        ydl_opts["format"] = fsel_video
         vfmt = (task.fmt or "").lower()
         if vfmt in {"mp4", "mkv", "webm"}:
-            cmd += ["--merge-output-format", vfmt]
+            ydl_opts["merge_output_format"] = vfmt
         # why: container preference without heavy re-encode
 
-    cmd += [task.url]
-
     try:
-        with task.lock:
-            task.status = "downloading"
-            task.progress = 0.0
-
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            encoding="utf-8",
-            errors="ignore",
-        )
+        task.status = "downloading"
+        task.progress = 0.0
 
-        assert process.stdout is not None
-        speed_re = re.compile(r"([0-9.]+)\s*(KiB|MiB|GiB)/s")
-        eta_re = re.compile(r"ETA\s*(\d+):(\d+)")
-
-        for raw_line in process.stdout:
-            line = raw_line.strip()
-
-            # parse progress lines
-            if line.startswith("[download]") and "%" in line:
-                try:
-                    pct_part = line.split("%", 1)[0].split()[-1]
-                    pct = float(pct_part)
-                    with task.lock:
-                        task.progress = max(0.0, min(1.0, pct / 100.0))
-
-                    m = speed_re.search(line)
-                    if m:
-                        val, unit = m.groups()
-                        mult = 1024 if unit == "KiB" else (1024 ** 2 if unit == "MiB" else 1024 ** 3)
-                        with task.lock:
-                            task.speed = float(val) * mult
-
-                    m2 = eta_re.search(line)
-                    if m2:
-                        mm, ss = map(int, m2.groups())
-                        with task.lock:
-                            task.eta = mm * 60 + ss
-                except Exception:
-                    pass
-
-            # destination/merge lines -> set filename (DO NOT overwrite `title`)
-            if "Destination:" in line:
-                fname = line.split("Destination:", 1)[1].strip().strip('"')
-                with task.lock:
-                    task.filename = os.path.basename(fname)
-                    task.download_url = f"/downloads/{task.filename}"
-
-            if 'Merging formats into "' in line:
-                fname = line.split('Merging formats into "', 1)[1].rstrip('"')
-                with task.lock:
-                    task.filename = os.path.basename(fname)
-                    task.download_url = f"/downloads/{task.filename}"
-
-            # control checks
-            with task.lock:
-                if task.control == "pause":
-                    try:
-                        process.terminate()
-                    except Exception:
-                        pass
-                    task.status = "paused"
-                    return
-                if task.control == "cancel":
-                    try:
-                        process.terminate()
-                    except Exception:
-                        pass
-                    task.status = "canceled"
-                    return
-
-        process.wait()
+        try:
+            with YoutubeDL(ydl_opts) as ydl:
+                ydl.download([task.url])
+        except DownloadCancelled as exc:
+            task.status = "paused" if exc.control == "pause" else "canceled"
+            return
+        except Exception:
+            # a hook-raised cancel can surface wrapped in yt-dlp's own error type
+            if task.control in ("pause", "cancel"):
+                task.status = "paused" if task.control == "pause" else "canceled"
+                return
+            raise
 
         # if filename not captured earlier, try to find a file matching the task id
         if not task.filename:
-            matches = sorted(glob.glob(os.path.join(DOWNLOAD_DIR, f"{task.id}.*")))
-            if matches:
-                fname = os.path.basename(matches[0])
-                with task.lock:
-                    task.filename = fname
-                    task.download_url = f"/downloads/{fname}"
-
-        with task.lock:
-            if task.status not in ("paused", "canceled"):
+            prefix = f"{task.id}."
+            with os.scandir(DOWNLOAD_DIR) as it:
+                fname = next((e.name for e in it if e.name.startswith(prefix)), None)
+            if fname:
+                task.filename = fname
+                task.download_url = f"/downloads/{fname}"
+
+        if task.status not in ("paused", "canceled"):
+            if task.filename:  # only complete if we got a real file
                 task.progress = 1.0
                 task.status = "completed"
                 task.downloaded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                if task.filename:
-                    task.download_url = f"/downloads/{task.filename}"
-
-                if task.status not in ("paused", "canceled"):
-                    if task.filename:  # only complete if we got a real file
-                        task.progress = 1.0
-                        task.status = "completed"
-                        task.downloaded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        task.download_url = f"/downloads/{task.filename}"
-                    else:
-                        task.status = "error"
-                        task.message = "Download finished but file not found"
+                task.download_url = f"/downloads/{task.filename}"
+            else:
+                task.status = "error"
+                task.message = "Download finished but file not found"
 
     except Exception as e:
-        with task.lock:
-            task.status = "error"
-            task.message = str(e)
+        task.status = "error"
+        task.message = str(e)
+
+
+async def run_ytdlp(task: Task):
+    # YoutubeDL is synchronous; run it on the dedicated download pool so the
+    # default to_thread executor stays free for short-lived calls
+    await asyncio.get_running_loop().run_in_executor(EXECUTOR, _run_ytdlp_blocking, task)
 
 
-def run_image(task: Task):
+async def run_image(task: Task):
     try:
-        with task.lock:
-            task.status = "downloading"
-            task.progress = 0.0
-
-        r = requests.get(task.url, stream=True, timeout=60)
-        r.raise_for_status()
-        ext = (task.fmt or "jpg").lstrip(".")
-        fname = f"{task.id}.{ext}"
-        fpath = os.path.join(DOWNLOAD_DIR, fname)
-
-        total = int(r.headers.get("content-length", 0) or 0)
-        downloaded = 0
-        start = time.time()
-
-        with open(fpath, "wb") as f:
-            for chunk in r.iter_content(1024 * 64):
-                if not chunk:
-                    continue
-
-                with task.lock:
-                    if task.control == "pause":
-                        task.status = "paused"
-                        return
-                    if task.control == "cancel":
-                        task.status = "canceled"
-                        return
-
-                f.write(chunk)
-                downloaded += len(chunk)
-
-                if total:
-                    with task.lock:
-                        task.progress = max(0.0, min(1.0, downloaded / total))
-                        elapsed = max(1, time.time() - start)
-                        task.speed = downloaded / elapsed
-                        remaining = total - downloaded
-                        task.eta = int(remaining / task.speed) if task.speed else None
-
-        with task.lock:
-            task.status = "completed"
-            task.progress = 1.0
-            task.filename = fname
-            task.download_url = f"/downloads/{fname}"
-            task.downloaded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            task.download_url = f"/downloads/{fname}"
+        task.status = "downloading"
+        task.progress = 0.0
+
+        # connect/per-read gaps like requests' timeout=60, not a cap on the
+        # whole transfer — large images legitimately take longer than 60 s
+        timeout = aiohttp.ClientTimeout(sock_connect=60, sock_read=60)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(task.url) as r:
+                r.raise_for_status()
+                ext = (task.fmt or "jpg").lstrip(".")
+                fname = f"{task.id}.{ext}"
+                fpath = os.path.join(DOWNLOAD_DIR, fname)
+
+                total = int(r.headers.get("content-length", 0) or 0)
+                downloaded = 0
+                start = time.time()
+                last_update = 0.0
+
+                async with aiofiles.open(fpath, "wb") as f:
+                    async for chunk in r.content.iter_chunked(1024 * 1024):
+                        if not chunk:
+                            continue
+
+                        # bare read is fine: a str attribute load is atomic under the GIL
+                        if task.control == "pause":
+                            task.status = "paused"
+                            return
+                        if task.control == "cancel":
+                            task.status = "canceled"
+                            return
+
+                        await f.write(chunk)
+                        downloaded += len(chunk)
+
+                        # publish progress at most every 100 ms, not per chunk
+                        now = time.monotonic()
+                        if total and now - last_update > 0.1:
+                            last_update = now
+                            task.progress = max(0.0, min(1.0, downloaded / total))
+                            elapsed = max(1, time.time() - start)
+                            task.speed = downloaded / elapsed
+                            remaining = total - downloaded
+                            task.eta = int(remaining / task.speed) if task.speed else None
+
+        task.status = "completed"
+        task.progress = 1.0
+        task.filename = fname
+        task.download_url = f"/downloads/{fname}"
+        task.downloaded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        task.download_url = f"/downloads/{fname}"
 
     except Exception as e:
-        with task.lock:
-            task.status = "error"
-            task.message = str(e)
+        task.status = "error"
+        task.message = str(e)
 
 
 # ---- Auto cleanup worker ----
 def cleanup_worker():
     while True:
+        time.sleep(60)  # ±1 min cleanup latency is fine for a 10 min TTL
         now = time.time()
-        for tid, task in list(manager.tasks.items()):
-            with task.lock:
-                if task.status in ("completed", "canceled") and task.filename:
-                    fpath = os.path.join(DOWNLOAD_DIR, task.filename)
-                    # agar file 10 min purani hai to delete
-                    if os.path.exists(fpath):
-                        mtime = os.path.getmtime(fpath)
-                        if now - mtime > 600:  # 600 sec = 10 min
-                            try:
-                                os.remove(fpath)
-                                print(f"🧹 Deleted old file: {fpath}")
-                            except Exception as e:
-                                print("Cleanup error:", e)
+        if not manager._cleanup_candidates:
+            continue
+
+        # one scandir pass replaces exists()+getmtime() (two stats) per candidate
+        try:
+            with os.scandir(DOWNLOAD_DIR) as it:
+                mtimes = {e.name: e.stat(follow_symlinks=False).st_mtime for e in it if e.is_file()}
+        except OSError as e:
+            print("Cleanup error:", e)
+            continue
+
+        # only finished/canceled tasks are candidates; set is fed by Task.__setattr__
+        for tid in list(manager._cleanup_candidates):
+            task = manager.tasks.get(tid)
+            if task is None:
+                manager._cleanup_candidates.discard(tid)
+                continue
+            fname = task.filename
+            mtime = mtimes.get(fname) if fname else None
+            if mtime is None:
+                # no file on disk (e.g. canceled before anything was saved):
+                # nothing to clean — keep the task listed until the user
+                # clears it via the clear-completed/clear-canceled endpoints
+                manager._cleanup_candidates.discard(tid)
+                continue
+            # agar file 10 min purani hai to delete
+            if now - mtime <= 600:  # 600 sec = 10 min
+                continue
+            fpath = os.path.join(DOWNLOAD_DIR, fname)
+            try:
+                os.remove(fpath)
+                print(f"🧹 Deleted old file: {fpath}")
+            except Exception as e:
+                print("Cleanup error:", e)
+                continue
+            # file deleted: drop the finished task with it
+            with manager.lock:
+                manager.tasks.pop(tid, None)
+            manager._cleanup_candidates.discard(tid)
+            manager.touch()
 
 
 
@@ -422,8 +491,18 @@ threading.Thread(target=cleanup_worker, daemon=True).start()
 
 MAX_TASKS = 20
 
-@app.post("/api/download/start", response_model=TaskStatus)
-def start_download(req: StartRequest):
+# dedicated pool for blocking download work: a yt-dlp run holds its thread
+# for the whole download, and asyncio.to_thread's shared default executor is
+# sized min(32, cpus + 4) — far below MAX_TASKS on small hosts, so downloads
+# would starve health checks and every other to_thread caller
+EXECUTOR = ThreadPoolExecutor(max_workers=MAX_TASKS, thread_name_prefix="dl")
+
+# shared pool bound: at most MAX_TASKS downloads run concurrently,
+# including resumes (which bypass the start_download active-count check)
+DOWNLOAD_POOL = asyncio.Semaphore(MAX_TASKS)
+
+@api_router.post("/download/start", response_model=TaskStatus)
+async def start_download(req: StartRequest):
     if len([t for t in manager.tasks.values() if t.status in ("pending","downloading")]) >= MAX_TASKS:
         raise HTTPException(429, "⚠️ Too many active downloads (max 20). Please wait or clear old tasks.")
 
@@ -431,94 +510,112 @@ def start_download(req: StartRequest):
     task = Task(tid, req)
     manager.tasks[tid] = task
 
-    # fetch title separately and store in task.title (do not use as filename)
-    title = get_video_title(req.url)
-    if title:
-        with task.lock:
-            task.title = title
-
-    def runner():
-        if task.category in ["video", "audio"]:
-            run_ytdlp(task)
-        elif task.category == "image":
-            run_image(task)
-        else:
-            with task.lock:
+    async def runner():
+        async with DOWNLOAD_POOL:
+            # fetch title in the worker so /start returns immediately
+            # (stored in task.title; never used as the filename)
+            title = await asyncio.get_running_loop().run_in_executor(EXECUTOR, get_video_title, task.url)
+            if title:
+                task.title = title
+
+            if task.category in ["video", "audio"]:
+                await run_ytdlp(task)
+            elif task.category == "image":
+                await run_image(task)
+            else:
                 task.status = "error"
                 task.message = "Unsupported category"
 
-    t = threading.Thread(target=runner, daemon=True)
-    task.thread = t
-    t.start()
+    task.worker = asyncio.create_task(runner())
     return task.to_status()
 
 
-@app.get("/api/download/all", response_model=List[TaskStatus])
-def all_status():
-    return manager.all()
-
-
-@app.get("/api/download/{tid}/status", response_model=TaskStatus)
-def get_status(tid: str):
+@api_router.get("/download/all", response_model=List[TaskStatus])
+async def all_status():
+    # cached dict snapshot: skip per-poll Pydantic re-validation
+    # (headers set here because a directly-returned Response skips the
+    # router's _no_cache dependency)
+    return ORJSONResponse(content=manager.all(), headers=_NO_CACHE_HEADERS)
+
+
+@api_router.get("/download/events", include_in_schema=False)
+async def download_events():
+    # SSE push: serialize the snapshot only when something changed instead
+    # of on every client poll; idle tasks cost subscribers nothing
+    async def event_stream():
+        last_version = -1
+        while True:
+            version = manager._version
+            if version != last_version:
+                last_version = version
+                payload = orjson.dumps(manager.all()).decode()
+                yield f"event: tasks\ndata: {payload}\n\n"
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
+    )
+
+
+@api_router.get("/download/{tid}/status", response_model=TaskStatus)
+async def get_status(tid: str):
     try:
         return manager.get(tid).to_status()
     except KeyError:
         raise HTTPException(404, "Task not found")
 
 
-@app.post("/api/download/{tid}/pause", response_model=TaskStatus)
-def pause_task(tid: str):
+@api_router.post("/download/{tid}/pause", response_model=TaskStatus)
+async def pause_task(tid: str):
     try:
         task = manager.get(tid)
     except KeyError:
         raise HTTPException(404, "Task not found")
-    with task.lock:
-        task.control = "pause"
-        task.status = "paused"
+    task.control = "pause"
+    task.status = "paused"
     return task.to_status()
 
 
-@app.post("/api/download/{tid}/cancel", response_model=TaskStatus)
-def cancel_task(tid: str):
+@api_router.post("/download/{tid}/cancel", response_model=TaskStatus)
+async def cancel_task(tid: str):
     try:
         task = manager.get(tid)
     except KeyError:
         raise HTTPException(404, "Task not found")
-    with task.lock:
-        task.control = "cancel"
-        task.status = "canceled"
+    task.control = "cancel"
+    task.status = "canceled"
     return task.to_status()
 
 
-@app.post("/api/download/{tid}/resume", response_model=TaskStatus)
-def resume_task(tid: str):
+@api_router.post("/download/{tid}/resume", response_model=TaskStatus)
+async def resume_task(tid: str):
     try:
         task = manager.get(tid)
     except KeyError:
         raise HTTPException(404, "Task not found")
 
-    with task.lock:
-        task.control = ""  # reset control flag before resuming
-        task.status = "downloading"
+    task.control = ""  # reset control flag before resuming
+    task.status = "downloading"
 
-    def runner():
-        if task.category in ["video", "audio"]:
-            run_ytdlp(task)
-        elif task.category == "image":
-            run_image(task)
+    async def runner():
+        async with DOWNLOAD_POOL:
+            if task.category in ["video", "audio"]:
+                await run_ytdlp(task)
+            elif task.category == "image":
+                await run_image(task)
 
-    t = threading.Thread(target=runner, daemon=True)
-    task.thread = t
-    t.start()
+    task.worker = asyncio.create_task(runner())
     return task.to_status()
 
-@app.post("/api/download/clear-completed")
-def clear_completed_tasks():
+@api_router.post("/download/clear-completed")
+async def clear_completed_tasks():
     manager.clear_completed()
     return {"message": "Completed tasks cleared"}
 
-@app.post("/api/clear-canceled")
-def clear_canceled():
+@api_router.post("/clear-canceled")
+async def clear_canceled():
     manager.clear_canceled()
     return {"status": "ok"}
 
@@ -527,6 +624,8 @@ def clear_canceled():
 
 
 
+app.include_router(api_router)
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 app.mount("/downloads", StaticFiles(directory=DOWNLOAD_DIR), name="downloads")
 
@@ -540,16 +639,41 @@ def _no_cache_file_response(path: str) -> FileResponse:
 
 if os.path.exists(FRONTEND_DIST):
     app.mount("/assets", StaticFiles(directory=os.path.join(FRONTEND_DIST, "assets")), name="assets")
-    app.mount("/", StaticFiles(directory=FRONTEND_DIST, html=True), name="frontend")
+    # NOTE: no StaticFiles mount at "/" — a Mount("/") matches every path
+    # before the routes below, which would shadow the cached index handlers;
+    # serve_spa serves the remaining dist files instead
+
+    _INDEX_PATH = os.path.join(FRONTEND_DIST, "index.html")
+    _index_cache = {"bytes": b"", "mtime": 0.0, "checked": 0.0}
+
+    def _index_response() -> Response:
+        # serve index.html straight from RAM; re-stat at most every 5 s
+        # so a rebuilt frontend is still picked up in dev
+        now = time.monotonic()
+        if now - _index_cache["checked"] > 5.0 or not _index_cache["bytes"]:
+            _index_cache["checked"] = now
+            try:
+                mtime = os.path.getmtime(_INDEX_PATH)
+                if mtime != _index_cache["mtime"]:
+                    with open(_INDEX_PATH, "rb") as f:
+                        _index_cache["bytes"] = f.read()
+                    _index_cache["mtime"] = mtime
+            except OSError:
+                pass
+        return Response(
+            _index_cache["bytes"],
+            media_type="text/html",
+            headers={"Cache-Control": "no-cache", "Pragma": "no-cache", "Expires": "0"},
+        )
 
     @app.get("/", include_in_schema=False)
     async def _root():
-        return _no_cache_file_response(os.path.join(FRONTEND_DIST, "index.html"))
+        return _index_response()
 
     @app.get("/index.html", include_in_schema=False)
     async def _index_html():
-        return _no_cache_file_response(os.path.join(FRONTEND_DIST, "index.html"))
-    
+        return _index_response()
+
     @app.get("/sw.js", include_in_schema=False)
     async def _sw():
         return _no_cache_file_response(os.path.join(FRONTEND_DIST, "sw.js"))
@@ -564,8 +688,12 @@ if os.path.exists(FRONTEND_DIST):
 
     @app.get("/{full_path:path}", include_in_schema=False)
     async def serve_spa(full_path: str):
-        # For any SPA path return fresh index.html
-        return _no_cache_file_response(os.path.join(FRONTEND_DIST, "index.html"))
+        # real dist files (vite.svg, robots.txt, ...) come from disk;
+        # any other SPA path returns fresh index.html
+        candidate = os.path.abspath(os.path.join(FRONTEND_DIST, full_path))
+        if candidate.startswith(FRONTEND_DIST + os.sep) and os.path.isfile(candidate):
+            return FileResponse(candidate)
+        return _index_response()
 
 
 